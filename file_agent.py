@@ -1,102 +1,375 @@
 import os
 import json
 import argparse
+import heapq
+import queue
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from pathlib import Path
 
 # 加载环境变量
 load_dotenv()
 
+# json 模块的C实现字符串编码器，与 ensure_ascii=False 时 json.dump 的输出一致
+_encode_json_str = json.encoder.encode_basestring
+
+# 文件大小单位，每级相差 1024 倍
+_SIZE_NAMES = ("B", "KB", "MB", "GB")
+
+# 发给AI的结构文本超过该行数时改为输出概要
+_PROMPT_MAX_LINES = 1000
+
+# 树状结构每累积多少行写出一次（约 64 KB）
+_TREE_CHUNK_LINES = 1024
+
+# 最多缓存多少个目录的扫描结果
+_STRUCTURE_CACHE_SIZE = 8
+
 class FileStructureAgent:
-    def __init__(self):
+    def __init__(self, max_workers=1):
         """
         初始化Agent，从环境变量读取API密钥
+        max_workers > 1 时使用线程池并行扫描，适合目录很多的大型文件夹
         """
+        self.max_workers = max_workers
         self.api_key = os.getenv("DEEPSEEK_API_KEY")
         self.api_url = "https://api.deepseek.com/v1/chat/completions"
+        # 复用同一个会话，使预热建立的连接能被后续请求使用
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        # 扫描结果缓存: (绝对路径, 最大深度) -> (目录修改时间指纹, 结构)，按最近使用排序
+        # 指纹是扫描时记录的每个文件夹的修改时间，失效条件见 get_folder_structure
+        self._structure_cache = OrderedDict()
         
         if not self.api_key:
             raise ValueError("❌ 未找到DEEPSEEK_API_KEY环境变量，请检查.env文件")
 
-    def get_folder_structure(self, folder_path):
+    def get_folder_structure(self, folder_path, max_depth=None):
         """
         获取文件夹的完整结构
+        每个文件夹节点附带 total_size、file_count、folder_count 汇总，
+        树状显示、统计和AI分析直接读取，无需再次遍历
+        指定 max_depth 时，深度达到 max_depth 的文件夹不建立子节点，标记为 truncated，
+        其汇总值由只统计数量和大小的轻量扫描得到，与完整扫描一致
+        同一目录再次获取时，若其下所有文件夹的修改时间都未变化则直接返回缓存：
+        - 返回的是缓存中的同一个字典，修改它会影响之后所有对该目录的获取结果，
+          需要修改时请先 copy.deepcopy
+        - 只改写文件内容不会改变文件夹的修改时间，此时缓存的 size、total_size 可能过期
+        """
+        root_path = self._root_path(folder_path)
+        structure = self._cached_structure(root_path, max_depth)
+        if structure is not None:
+            return structure
+        
+        structure = self._new_folder_node(os.path.basename(root_path), root_path)
+        fingerprint = []
+        
+        if self.max_workers > 1:
+            self._scan_parallel(structure, self.max_workers, fingerprint, max_depth)
+        else:
+            self._scan_iterative(structure, fingerprint, max_depth)
+        
+        self._structure_cache[(root_path, max_depth)] = (fingerprint, structure)
+        if len(self._structure_cache) > _STRUCTURE_CACHE_SIZE:
+            self._structure_cache.popitem(last=False)
+            
+        return structure
+
+    def _cached_structure(self, root_path, max_depth=None):
+        """
+        返回仍然有效的缓存结构，没有或已失效时返回 None
+        """
+        key = (root_path, max_depth)
+        cached = self._structure_cache.get(key)
+        if cached is None:
+            return None
+        
+        fingerprint, structure = cached
+        try:
+            valid = all(os.stat(path).st_mtime_ns == mtime for path, mtime in fingerprint)
+        except OSError:
+            valid = False
+        
+        if not valid:
+            del self._structure_cache[key]
+            return None
+        
+        self._structure_cache.move_to_end(key)
+        return structure
+
+    def _root_path(self, folder_path):
+        """
+        检查路径并返回其绝对路径
+        只对扫描根目录计算一次，其下所有条目直接使用 DirEntry.path，
+        不再逐个拼接或规范化路径，也不解析符号链接
         """
         if not os.path.exists(folder_path):
             raise FileNotFoundError(f"路径不存在: {folder_path}")
         
-        structure = {
-            "name": os.path.basename(os.path.abspath(folder_path)),
+        return os.path.abspath(folder_path)
+
+    def _new_folder_node(self, name, path):
+        """
+        创建一个尚未扫描的文件夹节点
+        """
+        return {
+            "name": name,
             "type": "folder",
-            "path": os.path.abspath(folder_path),
+            "path": path,
             "children": []
         }
+
+    def _scan_one(self, folder_node, fingerprint=None, warn=True):
+        """
+        扫描单个目录，填充其子节点，返回需要继续扫描的子文件夹节点
+        传入 fingerprint 列表时，在读取目录之前记录该目录的修改时间供缓存校验
+        warn 为 False 时不打印无法读取的警告，只在节点上记录 error
+        """
+        folder_path = folder_node["path"]
+        children = folder_node["children"]
+        child_folders = []
         
         try:
-            items = os.listdir(folder_path)
+            if fingerprint is not None:
+                self._record_folder_mtime(folder_path, fingerprint)
             
-            for item in sorted(items):
-                item_path = os.path.join(folder_path, item)
-                
-                if os.path.isdir(item_path):
-                    structure["children"].append(self.get_folder_structure(item_path))
+            for entry in self._list_dir(folder_path):
+                # DirEntry 自带 d_type 与 stat 缓存，避免每个条目重复 stat
+                if entry.is_dir(follow_symlinks=False):
+                    child = self._new_folder_node(entry.name, entry.path)
+                    child_folders.append(child)
+                    children.append(child)
                 else:
-                    structure["children"].append({
-                        "name": item,
+                    children.append({
+                        "name": entry.name,
                         "type": "file",
-                        "path": item_path,
-                        "size": os.path.getsize(item_path)
+                        "path": entry.path,
+                        "size": entry.stat(follow_symlinks=False).st_size
                     })
                     
         except PermissionError:
-            print(f"⚠️ 没有权限访问: {folder_path}")
+            if warn:
+                print(f"⚠️ 没有权限访问: {folder_path}")
+            folder_node["error"] = "权限拒绝"
         except Exception as e:
-            print(f"❌ 扫描出错: {e}")
+            if warn:
+                print(f"❌ 扫描出错: {e}")
+            folder_node["error"] = f"错误: {e}"
+        
+        # stat 按 inode 顺序进行，显示时仍按名称排序
+        children.sort(key=lambda child: child["name"])
+        return child_folders
+
+    def _record_folder_mtime(self, folder_path, fingerprint):
+        """
+        在读取文件夹之前记录其修改时间，扫描期间发生的改动会使缓存失效
+        """
+        try:
+            mtime = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            # 无法获取修改时间的目录让缓存立即失效
+            mtime = None
+        fingerprint.append((folder_path, mtime))
+
+    def _list_dir(self, folder_path):
+        """
+        读取目录的全部条目
+        POSIX 系统上按 inode 排序，缓存未命中时后续的 stat 更接近顺序读盘；
+        Windows 上获取 inode 需要额外的系统调用，保持原顺序
+        """
+        # Linux 上 scandir 依赖的 readdir 已经按 32 KB 一批调用 getdents64，
+        # 并在C中解析出名称、d_type 和 inode；自行用 ctypes 调用 getdents64
+        # 再在 Python 中解析反而更慢
+        with os.scandir(folder_path) as it:
+            entries = list(it)
+        
+        if os.name == "posix":
+            entries.sort(key=lambda entry: entry.inode())
+        return entries
+
+    def _summarize_folder(self, folder_node):
+        """
+        汇总文件夹的大小与数量，要求子文件夹已先完成汇总
+        """
+        total_size = 0
+        file_count = 0
+        folder_count = 1
+        
+        for child in folder_node["children"]:
+            if child["type"] == "folder":
+                total_size += child["total_size"]
+                file_count += child["file_count"]
+                folder_count += child["folder_count"]
+            else:
+                total_size += child["size"]
+                file_count += 1
+        
+        folder_node["total_size"] = total_size
+        folder_node["file_count"] = file_count
+        folder_node["folder_count"] = folder_count
+
+    def _summarize_all(self, discovered):
+        """
+        按发现顺序的逆序汇总，保证子文件夹先于父文件夹完成
+        truncated 文件夹在扫描时已得到汇总值
+        """
+        for folder_node in reversed(discovered):
+            if not folder_node.get("truncated"):
+                self._summarize_folder(folder_node)
+
+    def _scan_limited(self, folder_node, depth, max_depth=None, fingerprint=None):
+        """
+        扫描深度限制之内的文件夹，返回需要继续扫描的子文件夹节点
+        达到 max_depth 的文件夹不建立子节点，只统计汇总值并标记为 truncated
+        """
+        if max_depth is None or depth < max_depth:
+            return self._scan_one(folder_node, fingerprint)
+        
+        folder_count, file_count, total_size = self._scan_sizes(folder_node["path"], fingerprint)
+        folder_node["truncated"] = True
+        folder_node["total_size"] = total_size
+        folder_node["file_count"] = file_count
+        folder_node["folder_count"] = folder_count
+        return []
+
+    def _scan_iterative(self, root, fingerprint=None, max_depth=None):
+        """
+        使用显式栈顺序扫描，避免深层目录触发递归深度限制
+        """
+        # 按发现顺序记录文件夹，父节点总在子节点之前
+        discovered = [root]
+        stack = deque([(root, 0)])
+        
+        while stack:
+            folder_node, depth = stack.pop()
+            child_folders = self._scan_limited(folder_node, depth, max_depth, fingerprint)
+            discovered.extend(child_folders)
+            stack.extend((child, depth + 1) for child in child_folders)
+        
+        self._summarize_all(discovered)
+
+    def _scan_parallel(self, root, max_workers=16, fingerprint=None, max_depth=None):
+        """
+        使用线程池并行扫描，子目录一经发现立即提交，
+        线程数即同时打开的目录句柄上限
+        """
+        # 按发现顺序记录文件夹，父节点总在子节点之前
+        discovered = [root]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 进行中的任务 -> 所扫描文件夹的深度
+            pending = {executor.submit(self._scan_limited, root, 0, max_depth, fingerprint): 0}
             
-        return structure
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth = pending.pop(future) + 1
+                    for child in future.result():
+                        discovered.append(child)
+                        future = executor.submit(self._scan_limited, child, depth, max_depth, fingerprint)
+                        pending[future] = depth
+        
+        self._summarize_all(discovered)
 
-    def display_structure_tree(self, folder_path, show_size=False):
+    def display_structure_tree(self, folder_path, show_size=False, structure=None):
         """
         以树状格式显示文件结构
+        逐行生成后按块写出，避免每行一次 print
+        没有现成的扫描结果时边扫描边显示，已显示的子树立即释放，
+        不在内存中保留完整结构
         """
-        print(f"🌳 文件夹结构: {os.path.abspath(folder_path)}")
+        scan = False
+        if structure is None:
+            root_path = self._root_path(folder_path)
+            structure = self._cached_structure(root_path)
+            if structure is None:
+                structure = self._new_folder_node(os.path.basename(root_path), root_path)
+                scan = True
+        
+        print(f"🌳 文件夹结构: {structure['path']}")
         print("=" * 70)
-        self._print_tree(folder_path, "", show_size)
+        
+        chunk = []
+        for line in self._tree_lines(structure, show_size, scan):
+            chunk.append(line)
+            if len(chunk) >= _TREE_CHUNK_LINES:
+                sys.stdout.write("".join(chunk))
+                chunk.clear()
+        sys.stdout.write("".join(chunk))
+        
         print("=" * 70)
 
-    def _print_tree(self, path, prefix, show_size=False):
+    def _tree_lines(self, structure, show_size=False, scan=False):
         """
-        递归打印树状结构
+        按深度优先顺序生成树状结构的每一行，文件夹在前、文件在后
+        scan 为 True 时结构尚未扫描，每个文件夹在显示到它时才扫描；
+        无法读取的文件夹已在树中显示错误标记，扫描时不再另外打印警告
         """
-        try:
-            items = sorted(os.listdir(path))
-            
-            folders = [item for item in items if os.path.isdir(os.path.join(path, item))]
-            files = [item for item in items if os.path.isfile(os.path.join(path, item))]
+        if scan:
+            self._scan_one(structure, warn=False)
+        if "error" in structure:
+            yield self._tree_error_line(structure, "")
+            return
+        
+        # 栈中每一帧: (子节点迭代器, 普通分支前缀, 最后分支前缀, 父级前缀)
+        stack = [self._tree_frame(structure, "", scan)]
+        
+        while stack:
+            children, branch, last_branch, prefix = stack[-1]
+            item = next(children, None)
+            if item is None:
+                stack.pop()
+                continue
             
-            all_items = folders + files
-            total_count = len(all_items)
+            child, is_last = item
+            connector = last_branch if is_last else branch
             
-            for i, item in enumerate(all_items):
-                item_path = os.path.join(path, item)
-                is_last = (i == total_count - 1)
-                
-                if item in folders:
-                    print(f"{prefix}{'└── ' if is_last else '├── '}📁 {item}/")
-                    new_prefix = prefix + ('    ' if is_last else '│   ')
-                    self._print_tree(item_path, new_prefix, show_size)
+            if child["type"] == "folder":
+                yield f"{connector}📁 {child['name']}/\n"
+                child_prefix = prefix + ("    " if is_last else "│   ")
+                if scan:
+                    self._scan_one(child, warn=False)
+                if "error" in child:
+                    yield self._tree_error_line(child, child_prefix)
+                elif child.get("truncated"):
+                    # 超出扫描深度、没有子节点的文件夹
+                    yield f"{child_prefix}└── ...\n"
                 else:
-                    size_info = ""
-                    if show_size:
-                        file_size = os.path.getsize(item_path)
-                        size_info = f" ({self._format_size(file_size)})"
-                    print(f"{prefix}{'└── ' if is_last else '├── '}📄 {item}{size_info}")
-                    
-        except PermissionError:
-            print(f"{prefix}└── 🔒 [权限拒绝]")
-        except Exception as e:
-            print(f"{prefix}└── ❌ [错误: {e}]")
+                    stack.append(self._tree_frame(child, child_prefix, scan))
+            elif show_size:
+                yield f"{connector}📄 {child['name']} ({self._format_size(child['size'])})\n"
+            else:
+                yield f"{connector}📄 {child['name']}\n"
+
+    def _tree_frame(self, folder_node, prefix, release=False):
+        """
+        为文件夹创建栈帧，分支前缀每层只拼接一次
+        release 为 True 时子节点只由栈帧持有，显示完即被释放
+        """
+        # 一次遍历完成分组，文件夹在前、文件在后
+        folders = []
+        files = []
+        for child in folder_node["children"]:
+            (folders if child["type"] == "folder" else files).append(child)
+        if release:
+            folder_node["children"] = []
+        
+        all_items = folders + files
+        last_index = len(all_items) - 1
+        children = ((child, i == last_index) for i, child in enumerate(all_items))
+        
+        return children, prefix + "├── ", prefix + "└── ", prefix
+
+    def _tree_error_line(self, folder_node, prefix):
+        """
+        无法读取的文件夹显示为一行错误标记
+        """
+        icon = "🔒" if folder_node["error"] == "权限拒绝" else "❌"
+        return f"{prefix}└── {icon} [{folder_node['error']}]\n"
 
     def _format_size(self, size_bytes):
         """
@@ -105,13 +378,9 @@ class FileStructureAgent:
         if size_bytes == 0:
             return "0 B"
         
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-            
-        return f"{size_bytes:.1f} {size_names[i]}"
+        # 每 10 个二进制位进一级单位，由位长直接算出单位下标
+        i = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_NAMES) - 1)
+        return f"{size_bytes / (1 << (i * 10)):.1f} {_SIZE_NAMES[i]}"
 
     def save_structure_to_json(self, structure, output_file):
         """
@@ -126,13 +395,94 @@ class FileStructureAgent:
             print(f"❌ 保存文件失败: {e}")
             return False
 
-    def analyze_with_ai(self, folder_path, question, max_depth=3):
+    def save_structure_streaming(self, folder_path, output_file):
+        """
+        边扫描边写出JSON，输出与 save_structure_to_json 相同，
+        但已写出的子树会立即释放，内存占用只与目录深度相关
+        """
+        root_path = self._root_path(folder_path)
+        root = self._new_folder_node(os.path.basename(root_path), root_path)
+        
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                # 栈中每一帧: [文件夹节点, 子节点迭代器, 深度, 是否已写出子节点]
+                stack = [self._open_json_folder(f, root, 0)]
+                
+                while stack:
+                    frame = stack[-1]
+                    folder_node, children, depth, has_children = frame
+                    child = next(children, None)
+                    
+                    if child is None:
+                        self._close_json_folder(f, folder_node, depth, has_children)
+                        stack.pop()
+                        continue
+                    
+                    f.write(",\n" if has_children else "\n")
+                    frame[3] = True
+                    
+                    if child["type"] == "folder":
+                        stack.append(self._open_json_folder(f, child, depth + 1))
+                    else:
+                        pad = "    " * (depth + 1)
+                        f.write(f'{pad}{{\n'
+                                f'{pad}  "name": {_encode_json_str(child["name"])},\n'
+                                f'{pad}  "type": "file",\n'
+                                f'{pad}  "path": {_encode_json_str(child["path"])},\n'
+                                f'{pad}  "size": {child["size"]}\n'
+                                f'{pad}}}')
+                        
+            print(f"✅ 文件结构已保存到: {output_file}")
+            return True
+        except Exception as e:
+            print(f"❌ 保存文件失败: {e}")
+            return False
+
+    def _open_json_folder(self, f, folder_node, depth):
+        """
+        扫描文件夹并写出其JSON开头部分，返回新的栈帧
+        """
+        self._scan_one(folder_node)
+        
+        pad = "    " * depth
+        f.write(f'{pad}{{\n'
+                f'{pad}  "name": {_encode_json_str(folder_node["name"])},\n'
+                f'{pad}  "type": "folder",\n'
+                f'{pad}  "path": {_encode_json_str(folder_node["path"])},\n'
+                f'{pad}  "children": [')
+        
+        return [folder_node, iter(folder_node["children"]), depth, False]
+
+    def _close_json_folder(self, f, folder_node, depth, has_children):
+        """
+        汇总文件夹并写出其JSON结尾部分，随后释放其子节点
+        """
+        self._summarize_folder(folder_node)
+        
+        pad = "    " * depth
+        f.write(f"\n{pad}  ]" if has_children else "]")
+        if "error" in folder_node:
+            f.write(f',\n{pad}  "error": {_encode_json_str(folder_node["error"])}')
+        for key in ("total_size", "file_count", "folder_count"):
+            f.write(f',\n{pad}  "{key}": {folder_node[key]}')
+        f.write(f"\n{pad}}}")
+        
+        # 父文件夹只需要本节点的汇总值
+        folder_node["children"] = []
+
+    def analyze_with_ai(self, folder_path, question, max_depth=3, structure=None, on_chunk=None):
         """
         使用DeepSeek API分析文件结构
+        已有扫描结果时可通过 structure 传入，避免重复扫描
+        回答以流式方式接收，每收到一段内容就调用一次 on_chunk，
+        返回完整的回答
         """
-        print("🤖 正在使用AI分析文件结构...")
+        if structure is None:
+            # 扫描目录的同时预先建立到API的TCP/TLS连接
+            self.start_warm_up()
+            # AI只看得到 max_depth 以内的结构，更深的子树不必扫描
+            structure = self.get_folder_structure(folder_path, max_depth=max_depth)
         
-        structure = self.get_folder_structure(folder_path)
         structure_text = self._structure_to_text(structure, max_depth=max_depth)
         
         prompt = f"""
@@ -165,69 +515,187 @@ class FileStructureAgent:
                     "content": prompt
                 }
             ],
-            "stream": False,
+            "stream": True,
             "temperature": 0.7
         }
         
         try:
-            response = requests.post(self.api_url, headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
-            answer = result["choices"][0]["message"]["content"]
+            with self._session.post(self.api_url, headers=headers, json=data,
+                                    timeout=60, stream=True) as response:
+                response.raise_for_status()
+                
+                parts = []
+                # 服务端以SSE格式逐段返回: "data: {...}"，以 "data: [DONE]" 结束
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    payload = line[len(b"data:"):].strip()
+                    if payload == b"[DONE]":
+                        break
+                    
+                    content = json.loads(payload)["choices"][0]["delta"].get("content")
+                    if content:
+                        parts.append(content)
+                        if on_chunk:
+                            on_chunk(content)
             
-            return answer
+            return "".join(parts)
             
         except requests.exceptions.RequestException as e:
             return f"❌ API调用失败: {e}"
         except Exception as e:
             return f"❌ 处理响应时出错: {e}"
 
+    def warm_up_connection(self):
+        """
+        预热到API服务器的连接，失败时忽略，由正式请求报告错误
+        连接超时设得较短，API不可达时尽快放弃
+        """
+        try:
+            self._session.head(self.api_url, timeout=(3, 10))
+        except requests.exceptions.RequestException:
+            pass
+
+    def start_warm_up(self):
+        """
+        在后台线程中预热连接，不等待其完成
+        正式请求不必排在预热之后，API不可达时也不会先等预热超时
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.submit(self.warm_up_connection)
+        executor.shutdown(wait=False)
+
     def _structure_to_text(self, structure, level=0, max_depth=3):
         """
-        将结构字典转换为可读的文本
+        将结构字典转换为发给AI的精简文本，D 表示文件夹，F 表示文件
+        深度超过 max_depth 一半的文件夹不再逐个列出文件，只给出汇总；
+        行数过多时改为输出概要
         """
-        if level > max_depth:
-            return "  " * level + "...\n"
-            
-        text = ""
-        indent = "  " * level
+        parts = []
+        indents = ["  " * i for i in range(max(level, max_depth) + 2)]
+        self._append_structure_text(parts, structure, level, max_depth, indents)
+        
+        if len(parts) > _PROMPT_MAX_LINES:
+            return self._structure_overview(structure)
+        return "".join(parts)
+
+    def _append_structure_text(self, parts, structure, level, max_depth, indents):
+        """
+        把结构的文本逐行追加到 parts，避免反复拼接字符串
+        """
+        indent = indents[level]
         
-        if structure["type"] == "folder":
-            text += f"{indent}📁 {structure['name']}/\n"
-            for child in structure["children"]:
-                text += self._structure_to_text(child, level + 1, max_depth)
+        if structure["type"] != "folder":
+            parts.append(f"{indent}F {structure['name']}\n")
+            return
+        
+        list_files = level < max_depth / 2
+        children = structure["children"]
+        # 逐个列出文件的文件夹和确实为空的文件夹不需要汇总
+        if (list_files and children) or not (children or structure.get("truncated")):
+            parts.append(f"{indent}D {structure['name']}/\n")
         else:
-            text += f"{indent}📄 {structure['name']} ({self._format_size(structure['size'])})\n"
-            
-        return text
+            parts.append(f"{indent}D {structure['name']}/ ({self._folder_totals(structure)})\n")
+        
+        if level >= max_depth:
+            return
+        
+        folders = []
+        files = []
+        for child in structure["children"]:
+            (folders if child["type"] == "folder" else files).append(child)
+        
+        for child in folders:
+            self._append_structure_text(parts, child, level + 1, max_depth, indents)
+        
+        if list_files:
+            # 按扩展名排序，同类文件相邻
+            files.sort(key=lambda child: (os.path.splitext(child["name"])[1], child["name"]))
+            for child in files:
+                self._append_structure_text(parts, child, level + 1, max_depth, indents)
 
-    def get_structure_summary(self, folder_path):
+    def _structure_overview(self, structure):
         """
-        获取文件结构统计信息
+        目录树过大时的概要: 总体数量、第一层中最大的10个文件夹的汇总以及最大的10个文件
         """
-        structure = self.get_folder_structure(folder_path)
+        parts = [f"D {structure['name']}/ (共 {structure['folder_count']} 个文件夹, "
+                 f"{self._folder_totals(structure)})\n"]
         
-        def count_items(struct):
-            folders = 0
-            files = 0
-            total_size = 0
-            
-            if struct["type"] == "folder":
-                folders += 1
-                for child in struct["children"]:
-                    if child["type"] == "folder":
-                        sub_folders, sub_files, sub_size = count_items(child)
-                        folders += sub_folders
-                        files += sub_files
-                        total_size += sub_size
+        folders = [child for child in structure["children"] if child["type"] == "folder"]
+        for child in heapq.nlargest(10, folders, key=lambda child: child["total_size"]):
+            parts.append(f"  D {child['name']}/ ({self._folder_totals(child)})\n")
+        if len(folders) > 10:
+            parts.append(f"  ... 另有 {len(folders) - 10} 个文件夹\n")
+        
+        parts.append("最大的10个文件:\n")
+        for child in heapq.nlargest(10, self._iter_files(structure), key=lambda child: child["size"]):
+            relative_path = os.path.relpath(child["path"], structure["path"])
+            parts.append(f"  F {relative_path} ({self._format_size(child['size'])})\n")
+        
+        return "".join(parts)
+
+    def _folder_totals(self, folder_node):
+        """
+        文件夹汇总的文本
+        """
+        return f"{folder_node['file_count']} 个文件, {self._format_size(folder_node['total_size'])}"
+
+    def _iter_files(self, structure):
+        """
+        遍历结构中的所有文件节点
+        """
+        stack = [structure]
+        while stack:
+            for child in stack.pop()["children"]:
+                if child["type"] == "folder":
+                    stack.append(child)
+                else:
+                    yield child
+
+    def _scan_sizes(self, folder_path, fingerprint=None):
+        """
+        只统计数量和大小的轻量扫描，不构建节点，也不保存每个文件的大小
+        这里用不到文件名，因此全程使用 bytes 路径，省去逐个文件名的解码
+        传入 fingerprint 列表时同样记录每个文件夹的修改时间
+        返回 (文件夹数量, 文件数量, 总大小)
+        """
+        folder_count = 0
+        file_count = 0
+        total_size = 0
+        stack = [os.fsencode(self._root_path(folder_path))]
+        
+        while stack:
+            path = stack.pop()
+            folder_count += 1
+            try:
+                if fingerprint is not None:
+                    self._record_folder_mtime(os.fsdecode(path), fingerprint)
+                for entry in self._list_dir(path):
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
                     else:
-                        files += 1
-                        total_size += child.get("size", 0)
-            
-            return folders, files, total_size
+                        file_count += 1
+                        total_size += entry.stat(follow_symlinks=False).st_size
+            except PermissionError:
+                print(f"⚠️ 没有权限访问: {os.fsdecode(path)}")
+            except Exception as e:
+                print(f"❌ 扫描出错: {e}")
+        
+        return folder_count, file_count, total_size
+
+    def get_structure_summary(self, folder_path, structure=None):
+        """
+        获取文件结构统计信息
+        """
+        if structure is None:
+            structure = self._cached_structure(self._root_path(folder_path))
         
-        folders, files, total_size = count_items(structure)
+        if structure is None:
+            folders, files, total_size = self._scan_sizes(folder_path)
+        else:
+            folders = structure["folder_count"]
+            files = structure["file_count"]
+            total_size = structure["total_size"]
         
         summary = f"""
 📊 文件结构统计:
@@ -315,6 +783,13 @@ def setup_argument_parser():
         help="AI分析时的最大目录深度 (默认: 3)"
     )
     
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="并行扫描的线程数，大型目录树建议设为 8~16 (默认: 1，即顺序扫描)"
+    )
+    
     parser.add_argument(
         "--all", "-a",
         action="store_true",
@@ -339,7 +814,7 @@ def main():
     
     try:
         # 创建Agent实例
-        agent = FileStructureAgent()
+        agent = FileStructureAgent(max_workers=args.workers)
         print("🚀 DeepSeek 文件结构分析Agent")
         print(f"📍 扫描路径: {os.path.abspath(args.path)}")
         print("-" * 50)
@@ -359,35 +834,70 @@ def main():
         
         results = {}
         
-        # 显示树状结构
-        if args.tree:
-            print("\n🌳 文件结构树:")
-            agent.display_structure_tree(args.path, args.size)
-            results['tree'] = True
-        
-        # 显示统计信息
-        if args.stats:
-            print("\n📊 统计信息:")
-            summary = agent.get_structure_summary(args.path)
-            print(summary)
-            results['stats'] = True
-        
-        # 保存到JSON
-        if args.json:
-            print(f"\n💾 保存文件结构到: {args.json}")
-            structure = agent.get_folder_structure(args.path)
-            if agent.save_structure_to_json(structure, args.json):
-                results['json'] = args.json
-        
-        # AI分析
-        if args.ai:
-            print(f"\n🤖 AI分析:")
-            print(f"问题: {args.ai}")
-            print("-" * 50)
-            answer = agent.analyze_with_ai(args.path, args.ai, args.depth)
-            print(answer)
-            print("-" * 50)
-            results['ai'] = True
+        # 单线程执行器在后台发出AI请求，与主线程的其他操作并行
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # 多个操作时只扫描一次，树状结构、统计、JSON和AI分析共用同一份结果；
+            # 只有一个操作时由该操作选择最省的扫描方式（如树状结构和JSON边扫描边输出、统计只累计大小），
+            # 这些方式都是顺序扫描，指定了并行线程数时仍使用完整的并行扫描
+            structure = None
+            operation_count = sum(1 for op in (args.tree, args.stats, args.json, args.ai) if op)
+            if operation_count > 1 or (args.workers > 1 and (args.tree or args.json or args.stats)):
+                if args.ai:
+                    # 扫描期间预先建立到API的连接
+                    agent.start_warm_up()
+                structure = agent.get_folder_structure(args.path)
+            
+            # 先在后台发出AI请求，流式返回的内容暂存在队列中，轮到AI分析时再输出
+            if args.ai:
+                chunks = queue.Queue()
+                ai_future = executor.submit(
+                    agent.analyze_with_ai, args.path, args.ai, args.depth, structure, chunks.put
+                )
+                ai_future.add_done_callback(lambda _: chunks.put(None))
+            
+            # 显示树状结构
+            if args.tree:
+                print("\n🌳 文件结构树:")
+                agent.display_structure_tree(args.path, args.size, structure)
+                results['tree'] = True
+            
+            # 显示统计信息
+            if args.stats:
+                print("\n📊 统计信息:")
+                summary = agent.get_structure_summary(args.path, structure)
+                print(summary)
+                results['stats'] = True
+            
+            # 保存到JSON
+            if args.json:
+                print(f"\n💾 保存文件结构到: {args.json}")
+                if structure is None:
+                    saved = agent.save_structure_streaming(args.path, args.json)
+                else:
+                    saved = agent.save_structure_to_json(structure, args.json)
+                if saved:
+                    results['json'] = args.json
+            
+            # AI分析
+            if args.ai:
+                print(f"\n🤖 AI分析:")
+                print(f"问题: {args.ai}")
+                print("-" * 50)
+                print("🤖 正在使用AI分析文件结构...")
+                
+                streamed = []
+                for chunk in iter(chunks.get, None):
+                    streamed.append(chunk)
+                    print(chunk, end="", flush=True)
+                
+                answer = ai_future.result()
+                if streamed:
+                    print()
+                if answer != "".join(streamed):
+                    # 调用失败时返回的是错误信息
+                    print(answer)
+                print("-" * 50)
+                results['ai'] = True
         
         # 如果没有指定任何操作，显示帮助
         if not any([args.tree, args.stats, args.json, args.ai, args.all]):